@@ -10,8 +10,11 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
 
+# Load .env before importing budget, which reads its limits at import time.
 load_dotenv()
 
+from budget import FilePlan, TokenBudget, estimate_tokens, CHARS_PER_TOKEN, TOKEN_BUDGET, MAX_FILE_TOKENS
+
 # --- 1. SETUP THE BRAIN ---
 api_key = os.environ.get("GOOGLE_API_KEY")
 if not api_key:
@@ -27,6 +30,8 @@ llm = ChatGoogleGenerativeAI(
 )
 
 TARGET_DIR = "" 
+PLAN = None
+BUDGET = TokenBudget()
 
 # --- 2. UTILS ---
 def get_python_files(directory):
@@ -55,6 +60,23 @@ def run_cmd(cmd_list, desc):
         print(f"   ⚠️  Tool Failed (Will attempt AI Fallback if available)")
         return False
 
+def reserve(phase, tokens, filename, rest, cost):
+    """Reserve tokens for one LLM call. False means the file is left unfixed.
+
+    Once none of the files in `rest` could fit, the phase is marked exhausted
+    and later files that need a call are recorded as deferred without trying.
+    """
+    if phase in BUDGET.exhausted:
+        BUDGET.defer(phase, [filename])
+        print(f"      💸 Token budget exhausted, deferring {filename}")
+        return False
+    if BUDGET.spend(phase, tokens, filename):
+        return True
+    print(f"      💸 Over token budget, skipping {filename}")
+    if BUDGET.remaining <= 0 or not any(cost(f) <= BUDGET.remaining for f in rest):
+        BUDGET.exhausted.add(phase)
+    return False
+
 # --- 3. THE PHASES ---
 
 def phase_1_syntax():
@@ -65,9 +87,10 @@ def phase_1_syntax():
     
     # Step B: The AI Cleanup (Hybrid Loop)
     print("   🕵️  Scanning for stubborn Python 2 code...")
-    files = get_python_files(TARGET_DIR)
+    files = PLAN.order
+    cost = lambda f: PLAN.tokens[f] * 2
     
-    for file_path in files:
+    for i, file_path in enumerate(files):
         with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
             content = f.read()
         
@@ -75,6 +98,9 @@ def phase_1_syntax():
         if 'print "' in content or "print '" in content:
             filename = os.path.basename(file_path)
             print(f"   🧠 AI Detected Python 2 syntax in: {filename}")
+            # Rewrites cost the file twice: once in, once back out.
+            if not reserve("syntax", estimate_tokens(content) * 2, filename, files[i + 1:], cost):
+                continue
             print(f"      ↳ rewriting file...")
             
             prompt = ChatPromptTemplate.from_template(
@@ -119,6 +145,9 @@ def phase_3_dependencies():
     
     if all_imports:
         print(f"   🧠 Analyzing {len(all_imports)} imports...")
+        if not BUDGET.spend("dependencies", estimate_tokens("\n".join(all_imports)) * 2, "requirements.txt"):
+            print("   💸 Over token budget, skipping AI dependency scan")
+            return
         prompt = ChatPromptTemplate.from_template(
             "Convert these imports to a requirements.txt list. Ignore stdlib. Return ONLY content.\n{imports}"
         )
@@ -132,15 +161,18 @@ def phase_3_dependencies():
 
 def phase_4_documentation():
     print("\n🔹 [Phase 4] Auto-Documentation")
-    files = get_python_files(TARGET_DIR)
+    files = PLAN.order
+    cost = lambda f: min(PLAN.tokens[f], 1000 // CHARS_PER_TOKEN) + 50
     
-    for file_path in files:
+    for i, file_path in enumerate(files):
         with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
             code = f.read()
             
         if '"""' not in code[:100]:
             filename = os.path.basename(file_path)
             print(f"   📝 Generating Docstring for: {filename}...")
+            if not reserve("documentation", estimate_tokens(code[:1000]) + 50, filename, files[i + 1:], cost):
+                continue
             try:
                 prompt = ChatPromptTemplate.from_template(
                     "Write a one-line summary docstring for this code. Return ONLY the string.\nCODE: {code}"
@@ -156,10 +188,13 @@ def phase_4_documentation():
 def phase_5_readme():
     print("\n🔹 [Phase 5] README Generation")
     # Quick check to see what files exist
-    files = [os.path.basename(f) for f in get_python_files(TARGET_DIR)]
+    files = [os.path.basename(f) for f in PLAN.order]
     structure = "\n".join(files[:20])
     
     print(f"   🧠 analyzing project structure...")
+    if not BUDGET.spend("readme", estimate_tokens(structure) + 1000, "README.md"):
+        print("   💸 Over token budget, skipping README")
+        return
     prompt = ChatPromptTemplate.from_template(
         """Create a README.md for a project with these files:
         {structure}
@@ -175,9 +210,10 @@ def phase_5_readme():
 
 def phase_6_doctor_loop():
     print("\n🔹 [Phase 6] The Doctor (Logic Repair Loop)")
-    files = get_python_files(TARGET_DIR)
+    files = PLAN.order
+    cost = lambda f: PLAN.tokens[f] * 2
     
-    for file_path in files:
+    for i, file_path in enumerate(files):
         filename = os.path.basename(file_path)
         print(f"   🩺 Checkup: {filename}...")
         
@@ -193,6 +229,10 @@ def phase_6_doctor_loop():
             
             with open(file_path, "r", encoding="utf-8") as f:
                 broken_code = f.read()
+            
+            needed = estimate_tokens(error_msg) + estimate_tokens(broken_code) * 2
+            if not reserve("doctor", needed, filename, files[i + 1:], cost):
+                continue
                 
             prompt = ChatPromptTemplate.from_template(
                 """Act as a Python Debugger. Fix the error in this code.
@@ -217,6 +257,8 @@ def phase_6_doctor_loop():
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("folder", help="Target folder path")
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET, help="Max LLM tokens per run")
+    parser.add_argument("--max-file-tokens", type=int, default=MAX_FILE_TOKENS, help="Defer files larger than this")
     args = parser.parse_args()
     
     TARGET_DIR = os.path.abspath(args.folder)
@@ -226,6 +268,10 @@ if __name__ == "__main__":
 
     print(f"🔌 Connected to: {TARGET_DIR}")
     
+    BUDGET = TokenBudget(args.token_budget)
+    PLAN = FilePlan(TARGET_DIR, get_python_files(TARGET_DIR), args.max_file_tokens)
+    print(f"🗺️  Planned {len(PLAN.order)} files ({len(PLAN.deferred)} deferred, {BUDGET.total} token budget)")
+    
     phase_1_syntax()
     phase_2_format()
     phase_3_dependencies()
@@ -233,4 +279,5 @@ if __name__ == "__main__":
     phase_5_readme()
     phase_6_doctor_loop()
     
+    print("\n" + BUDGET.report())
     print("\n🏆 Repository Evolution Complete and cleaned BOSS")
\ No newline at end of file
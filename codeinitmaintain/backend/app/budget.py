@@ -0,0 +1,147 @@
+import os
+import math
+import subprocess
+
+# Rough rule of thumb for code with Gemini/GPT tokenizers.
+CHARS_PER_TOKEN = 4
+TOKEN_BUDGET = int(os.environ.get("TOKEN_BUDGET", "200000"))
+MAX_FILE_TOKENS = int(os.environ.get("MAX_FILE_TOKENS", "8000"))
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+
+# ------------------ file prioritization ------------------
+
+def module_name(path: str) -> str:
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name == "__init__":
+        name = os.path.basename(os.path.dirname(path))
+    return name
+
+
+def count_imports(sources: dict) -> dict:
+    """How many other files import each file's module name."""
+    names = {path: module_name(path) for path in sources}
+    counts = {path: 0 for path in sources}
+
+    for path, code in sources.items():
+        imported = set()
+        for line in code.splitlines():
+            line = line.strip()
+            if line.startswith("import "):
+                parts = line[len("import "):].split(",")
+            elif line.startswith("from ") and " import " in line:
+                # Names after import may be submodules (from . import views).
+                source, targets = line[len("from "):].split(" import ", 1)
+                parts = [source] + targets.strip("()\\ ").split(",")
+            else:
+                continue
+            for part in parts:
+                imported.update(part.strip().split(" as ")[0].lstrip(".").split("."))
+
+        for other, name in names.items():
+            if other != path and name in imported:
+                counts[other] += 1
+    return counts
+
+
+def recent_ranks(root: str, files: list, commits: int = 50) -> dict:
+    """0..1 recency per file: git history if available, else mtime."""
+    try:
+        out = subprocess.run(
+            # --relative keeps paths relative to root even when it is a subfolder.
+            ["git", "log", f"-n{commits}", "--name-only", "--relative", "--pretty=format:"],
+            cwd=root, check=True, capture_output=True, text=True,
+        ).stdout
+        order = []
+        for line in out.splitlines():
+            path = os.path.join(root, line.strip())
+            if line.strip() and path not in order:
+                order.append(path)
+        if order:
+            return {f: 1 - order.index(f) / len(order) if f in order else 0.0 for f in files}
+    except (OSError, subprocess.CalledProcessError):
+        pass
+
+    mtimes = {f: os.path.getmtime(f) for f in files}
+    ranked = sorted(files, key=lambda f: mtimes[f])
+    return {f: (i + 1) / len(ranked) for i, f in enumerate(ranked)}
+
+
+class FilePlan:
+    """Files in the order the LLM phases should spend tokens on them.
+
+    Small, widely imported, recently changed files come first. Files larger
+    than max_file_tokens are deferred to the end so they only run on what is
+    left of the budget.
+    """
+
+    def __init__(self, root: str, files: list, max_file_tokens: int = MAX_FILE_TOKENS):
+        sources = {f: read_text(f) for f in files}
+        self.tokens = {f: estimate_tokens(code) for f, code in sources.items()}
+        self.imports = count_imports(sources)
+        self.recency = recent_ranks(root, files) if files else {}
+
+        self.deferred = [f for f in files if self.tokens[f] > max_file_tokens]
+        ready = [f for f in files if self.tokens[f] <= max_file_tokens]
+
+        self.order = sorted(ready, key=self.score, reverse=True)
+        self.order += sorted(self.deferred, key=lambda f: self.tokens[f])
+
+    def score(self, path: str) -> float:
+        return (
+            math.log1p(self.imports[path])
+            + self.recency[path]
+            + 1 / (1 + self.tokens[path] / 1000)
+        )
+
+
+# ------------------ budget ------------------
+
+class TokenBudget:
+    def __init__(self, total: int = TOKEN_BUDGET):
+        self.total = total
+        self.used = 0
+        self.phases = {}
+        # Phases where nothing left could fit; later calls are deferred outright.
+        self.exhausted = set()
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.used
+
+    def _phase(self, phase: str) -> dict:
+        return self.phases.setdefault(phase, {"used": 0, "calls": 0, "skipped": [], "deferred": []})
+
+    def spend(self, phase: str, tokens: int, label: str = "") -> bool:
+        """Reserve tokens for one LLM call. False means skip the call."""
+        stats = self._phase(phase)
+        if tokens > self.remaining:
+            stats["skipped"].append(label)
+            return False
+        self.used += tokens
+        stats["used"] += tokens
+        stats["calls"] += 1
+        return True
+
+    def defer(self, phase: str, labels: list):
+        """Record files left unfixed because the budget had run out."""
+        self._phase(phase)["deferred"].extend(labels)
+
+    def report(self) -> str:
+        lines = [f"Token budget: {self.used}/{self.total} used"]
+        for phase, stats in self.phases.items():
+            line = f"  {phase}: {stats['used']} tokens, {stats['calls']} calls"
+            if stats["skipped"]:
+                line += f", {len(stats['skipped'])} skipped (over budget)"
+            if stats["deferred"]:
+                line += f", {len(stats['deferred'])} deferred (budget exhausted)"
+            lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,340 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+QUEUE_BACKEND = os.environ.get("JOB_QUEUE_BACKEND", "sqlite")
+QUEUE_PATH = os.environ.get("JOB_QUEUE_PATH", "jobs.db")
+LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "120"))
+MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+# Workers re-register every poll; a few missed polls means the worker is gone.
+WORKER_TTL_SECONDS = int(os.environ.get("WORKER_TTL_SECONDS", "15"))
+
+
+# ------------------ backend interface ------------------
+
+class JobQueue(ABC):
+    """Durable job queue shared by the API node and remote workers.
+
+    Jobs move queued -> leased -> done/error. A leased job whose lease is not
+    renewed by a heartbeat before it expires goes back to queued, or to
+    error once it has used up its attempts.
+    """
+
+    lease_seconds = LEASE_SECONDS
+
+    @abstractmethod
+    def enqueue(self, repo_url: str) -> str:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str):
+        ...
+
+    @abstractmethod
+    def register_worker(self, worker_id: str, capacity: int, active: int = 0):
+        ...
+
+    @abstractmethod
+    def lease(self, worker_id: str, max_jobs: int = 1) -> list:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def append_logs(self, job_id: str, worker_id: str, lines: list) -> bool:
+        ...
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        ...
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        ...
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        ...
+
+    @abstractmethod
+    def workers(self) -> list:
+        ...
+
+
+# ------------------ sqlite backend ------------------
+
+class SQLiteJobQueue(JobQueue):
+    """Single-file queue. Good for tests and for workers sharing a volume."""
+
+    def __init__(
+        self,
+        path: str = QUEUE_PATH,
+        lease_seconds: int = LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+        worker_ttl: int = WORKER_TTL_SECONDS,
+        clock=time.time,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_ttl = worker_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA busy_timeout = 5000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                repo_url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                logs TEXT NOT NULL DEFAULT '',
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY,
+                capacity INTEGER NOT NULL,
+                active INTEGER NOT NULL DEFAULT 0,
+                last_seen REAL NOT NULL
+            );
+            """
+        )
+
+    def _tx(self):
+        # BEGIN IMMEDIATE takes the write lock up front so two API processes
+        # sharing the file cannot lease the same job.
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, repo_url: str) -> str:
+        job_id = str(uuid.uuid4())
+        now = self.clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, repo_url, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, repo_url, now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "status": row["status"],
+            "repo_url": row["repo_url"],
+            "worker_id": row["worker_id"],
+            "attempts": row["attempts"],
+            "logs": row["logs"],
+        }
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        return job
+
+    def register_worker(self, worker_id: str, capacity: int, active: int = 0):
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO workers (id, capacity, active, last_seen) VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    capacity = excluded.capacity,
+                    active = excluded.active,
+                    last_seen = excluded.last_seen
+                """,
+                (worker_id, capacity, active, self.clock()),
+            )
+
+    def _requeue_expired(self, now: float) -> int:
+        expired = self._conn.execute(
+            "SELECT worker_id, COUNT(*) AS n FROM jobs WHERE status = 'leased' AND lease_expires < ? GROUP BY worker_id",
+            (now,),
+        ).fetchall()
+        for row in expired:
+            self._conn.execute(
+                "UPDATE workers SET active = MAX(active - ?, 0) WHERE id = ?", (row["n"], row["worker_id"])
+            )
+
+        # A job that keeps taking its worker down (OOM, hang) is given up on
+        # instead of being re-queued forever.
+        self._conn.execute(
+            """
+            UPDATE jobs SET status = 'error', lease_expires = NULL, updated_at = ?,
+                error = 'lease expired ' || attempts || ' times, giving up'
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """,
+            (now, now, self.max_attempts),
+        )
+        cur = self._conn.execute(
+            """
+            UPDATE jobs SET status = 'queued', worker_id = NULL, lease_expires = NULL, updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ?
+            """,
+            (now, now),
+        )
+        return cur.rowcount
+
+    def requeue_expired(self) -> int:
+        with self._lock:
+            self._tx()
+            try:
+                count = self._requeue_expired(self.clock())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def _grant(self, worker_id: str, max_jobs: int, now: float) -> int:
+        # Balance by load: when there are fewer queued jobs than free slots,
+        # workers with a lower active/capacity ratio get served first.
+        live = self._conn.execute(
+            "SELECT id, capacity, active FROM workers WHERE last_seen >= ?",
+            (now - self.worker_ttl,),
+        ).fetchall()
+        me = next((w for w in live if w["id"] == worker_id), None)
+        if me is None:
+            return 0
+
+        free = min(max_jobs, me["capacity"] - me["active"])
+        if free <= 0:
+            return 0
+
+        def load(w):
+            return w["active"] / max(w["capacity"], 1)
+
+        ahead = sum(
+            w["capacity"] - w["active"]
+            for w in live
+            if w["id"] != worker_id
+            and w["active"] < w["capacity"]
+            and (load(w), w["id"]) < (load(me), me["id"])
+        )
+        queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return max(0, min(free, queued - ahead))
+
+    def lease(self, worker_id: str, max_jobs: int = 1) -> list:
+        with self._lock:
+            self._tx()
+            try:
+                now = self.clock()
+                self._requeue_expired(now)
+                self._conn.execute("UPDATE workers SET last_seen = ? WHERE id = ?", (now, worker_id))
+
+                granted = self._grant(worker_id, max_jobs, now)
+                rows = self._conn.execute(
+                    "SELECT id, repo_url FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT ?",
+                    (granted,),
+                ).fetchall()
+                for row in rows:
+                    self._conn.execute(
+                        """
+                        UPDATE jobs SET status = 'leased', worker_id = ?, lease_expires = ?,
+                            attempts = attempts + 1, updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (worker_id, now + self.lease_seconds, now, row["id"]),
+                    )
+                if rows:
+                    self._conn.execute(
+                        "UPDATE workers SET active = active + ? WHERE id = ?", (len(rows), worker_id)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return [{"job_id": row["id"], "repo_url": row["repo_url"]} for row in rows]
+
+    def _owned_update(self, job_id: str, worker_id: str, sql: str, params: tuple) -> bool:
+        # Every worker write is fenced on (job, worker, leased): once a lease
+        # has expired and the job moved on, the old worker's writes are dropped.
+        with self._lock:
+            cur = self._conn.execute(
+                sql + " WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                params + (job_id, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        now = self.clock()
+        with self._lock:
+            self._conn.execute("UPDATE workers SET last_seen = ? WHERE id = ?", (now, worker_id))
+        return self._owned_update(
+            job_id, worker_id,
+            "UPDATE jobs SET lease_expires = ?, updated_at = ?",
+            (now + self.lease_seconds, now),
+        )
+
+    def append_logs(self, job_id: str, worker_id: str, lines: list) -> bool:
+        if not lines:
+            return True
+        return self._owned_update(
+            job_id, worker_id,
+            "UPDATE jobs SET logs = logs || ?, updated_at = ?",
+            ("".join(line + "\n" for line in lines), self.clock()),
+        )
+
+    def _finish(self, job_id: str, worker_id: str, status: str, result, error) -> bool:
+        ok = self._owned_update(
+            job_id, worker_id,
+            "UPDATE jobs SET status = ?, result = ?, error = ?, lease_expires = NULL, updated_at = ?",
+            (status, result, error, self.clock()),
+        )
+        if ok:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE workers SET active = MAX(active - 1, 0) WHERE id = ?", (worker_id,)
+                )
+        return ok
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        return self._finish(job_id, worker_id, "done", json.dumps(result), None)
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._finish(job_id, worker_id, "error", None, error)
+
+    def workers(self) -> list:
+        now = self.clock()
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM workers ORDER BY id").fetchall()
+        return [
+            {
+                "worker_id": row["id"],
+                "capacity": row["capacity"],
+                "active": row["active"],
+                "alive": row["last_seen"] >= now - self.worker_ttl,
+            }
+            for row in rows
+        ]
+
+
+# ------------------ factory ------------------
+
+BACKENDS = {
+    "sqlite": SQLiteJobQueue,
+}
+
+
+def get_queue(backend: str = QUEUE_BACKEND, **kwargs) -> JobQueue:
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown job queue backend: {backend}")
+    return cls(**kwargs)
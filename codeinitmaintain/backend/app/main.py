@@ -1,9 +1,18 @@
-from fastapi import FastAPI, BackgroundTasks
+import os
+import secrets
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import uuid
+from typing import List
+from dotenv import load_dotenv
 
-from orchestrator import run_maintainer
+# Load .env before importing job_queue, which reads its settings at import time.
+load_dotenv()
+
+from job_queue import get_queue
+
+# Shared secret workers send in X-Worker-Token. Unset means no worker is accepted.
+WORKER_TOKEN = os.environ.get("WORKER_TOKEN")
 
 app = FastAPI(title="AI Maintainer Backend")
 
@@ -15,34 +24,115 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-jobs = {}
+# The API node only enqueues; jobs are executed by worker.py processes.
+queue = get_queue()
 
 
 class RepoRequest(BaseModel):
     repo_url: str
 
 
-def maintainer_task(job_id: str, repo_url: str):
-    jobs[job_id] = {"status": "running", "logs": ""}
+class WorkerInfo(BaseModel):
+    worker_id: str
+    capacity: int = 1
+    active: int = 0
+
+
+class LeaseRequest(BaseModel):
+    worker_id: str
+    max_jobs: int = 1
+
+
+class WorkerUpdate(BaseModel):
+    worker_id: str
+
+
+class LogUpdate(BaseModel):
+    worker_id: str
+    lines: List[str]
+
 
-    def log_callback(line: str):
-        jobs[job_id]["logs"] += line + "\n"
+class ResultUpdate(BaseModel):
+    worker_id: str
+    result: dict
 
-    try:
-        result = run_maintainer(repo_url, log_callback=log_callback)
-        jobs[job_id] = {"status": "done", "result": result}
-    except Exception as e:
-        jobs[job_id] = {"status": "error", "error": str(e)}
+
+class ErrorUpdate(BaseModel):
+    worker_id: str
+    error: str
+
+
+def require_worker_token(x_worker_token: str = Header(None)):
+    if not WORKER_TOKEN or not x_worker_token or not secrets.compare_digest(x_worker_token, WORKER_TOKEN):
+        raise HTTPException(status_code=401, detail="invalid worker token")
+
+
+def _check_lease(ok: bool):
+    # 409 tells the worker its lease is gone and the job was handed elsewhere.
+    if not ok:
+        raise HTTPException(status_code=409, detail="lease lost")
+    return {"ok": True}
 
 
 @app.post("/run")
-def run_agent(req: RepoRequest, bg: BackgroundTasks):
-    job_id = str(uuid.uuid4())
-    jobs[job_id] = {"status": "running", "logs": ""}
-    bg.add_task(maintainer_task, job_id, req.repo_url)
+def run_agent(req: RepoRequest):
+    job_id = queue.enqueue(req.repo_url)
     return {"job_id": job_id, "status": "started"}
 
 
 @app.get("/status/{job_id}")
 def get_status(job_id: str):
-    return jobs.get(job_id, {"status": "not_found"})
+    job = queue.get(job_id)
+    if job is None:
+        return {"status": "not_found"}
+    # worker_id is the lease fencing token, so it never leaves the worker protocol.
+    job.pop("worker_id", None)
+    # The UI only knows running/done/error; the queue state is kept separately.
+    job["queue_state"] = job["status"]
+    if job["status"] in ("queued", "leased"):
+        job["status"] = "running"
+    return job
+
+
+# ------------------ worker protocol ------------------
+
+workers = APIRouter(dependencies=[Depends(require_worker_token)])
+
+
+@workers.post("/workers/register")
+def register_worker(info: WorkerInfo):
+    queue.register_worker(info.worker_id, info.capacity, info.active)
+    return {"ok": True, "lease_seconds": queue.lease_seconds}
+
+
+@workers.get("/workers")
+def list_workers():
+    return queue.workers()
+
+
+@workers.post("/jobs/lease")
+def lease_jobs(req: LeaseRequest):
+    return {"jobs": queue.lease(req.worker_id, req.max_jobs)}
+
+
+@workers.post("/jobs/{job_id}/heartbeat")
+def heartbeat(job_id: str, req: WorkerUpdate):
+    return _check_lease(queue.heartbeat(job_id, req.worker_id))
+
+
+@workers.post("/jobs/{job_id}/logs")
+def append_logs(job_id: str, req: LogUpdate):
+    return _check_lease(queue.append_logs(job_id, req.worker_id, req.lines))
+
+
+@workers.post("/jobs/{job_id}/complete")
+def complete_job(job_id: str, req: ResultUpdate):
+    return _check_lease(queue.complete(job_id, req.worker_id, req.result))
+
+
+@workers.post("/jobs/{job_id}/fail")
+def fail_job(job_id: str, req: ErrorUpdate):
+    return _check_lease(queue.fail(job_id, req.worker_id, req.error))
+
+
+app.include_router(workers)
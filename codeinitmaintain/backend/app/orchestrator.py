@@ -64,54 +64,54 @@ def fork_repo(upstream_repo: str):
         resp.raise_for_status()
 
 
-def clone_repo(upstream_repo: str, log):
-    if os.path.exists(CLONE_DIR):
-        shutil.rmtree(CLONE_DIR)
+def clone_repo(upstream_repo: str, log, clone_dir=CLONE_DIR):
+    if os.path.exists(clone_dir):
+        shutil.rmtree(clone_dir)
 
     repo_name = upstream_repo.rstrip("/").split("/")[-1]
     fork_url = f"https://{GITHUB_TOKEN}@github.com/{USERNAME}/{repo_name}.git"
 
-    run(f"git clone {fork_url} {CLONE_DIR}", log_callback=log)
+    run(f"git clone {fork_url} {clone_dir}", log_callback=log)
 
 
-def sync_fork(upstream_repo: str, log):
+def sync_fork(upstream_repo: str, log, clone_dir=CLONE_DIR):
     try:
-        run(f"git remote add upstream {upstream_repo}", cwd=CLONE_DIR, log_callback=log)
+        run(f"git remote add upstream {upstream_repo}", cwd=clone_dir, log_callback=log)
     except Exception:
         pass
 
-    run("git fetch upstream", cwd=CLONE_DIR, log_callback=log)
-    run("git checkout main", cwd=CLONE_DIR, log_callback=log)
-    run("git merge upstream/main", cwd=CLONE_DIR, log_callback=log)
-    run("git push origin main", cwd=CLONE_DIR, log_callback=log)
+    run("git fetch upstream", cwd=clone_dir, log_callback=log)
+    run("git checkout main", cwd=clone_dir, log_callback=log)
+    run("git merge upstream/main", cwd=clone_dir, log_callback=log)
+    run("git push origin main", cwd=clone_dir, log_callback=log)
 
 
-def checkout_branch(log):
+def checkout_branch(log, clone_dir=CLONE_DIR):
     try:
-        run(f"git checkout -b {BRANCH}", cwd=CLONE_DIR, log_callback=log)
+        run(f"git checkout -b {BRANCH}", cwd=clone_dir, log_callback=log)
     except Exception:
-        run(f"git checkout {BRANCH}", cwd=CLONE_DIR, log_callback=log)
+        run(f"git checkout {BRANCH}", cwd=clone_dir, log_callback=log)
 
 
 # ------------------ docker ------------------
 
-def run_docker(log):
-    abs_path = os.path.abspath(CLONE_DIR)
+def run_docker(log, clone_dir=CLONE_DIR):
+    abs_path = os.path.abspath(clone_dir)
     run("docker build -t ai-sandbox .", log_callback=log)
     run(f"docker run --rm -v {abs_path}:/agent/repo ai-sandbox", log_callback=log)
 
 
 # ------------------ commit & PR ------------------
 
-def commit_and_push(log):
-    run("git add .", cwd=CLONE_DIR, log_callback=log)
+def commit_and_push(log, clone_dir=CLONE_DIR):
+    run("git add .", cwd=clone_dir, log_callback=log)
 
     try:
-        run('git commit -m "AI Maintainer update"', cwd=CLONE_DIR, log_callback=log)
+        run('git commit -m "AI Maintainer update"', cwd=clone_dir, log_callback=log)
     except Exception:
         return False
 
-    run(f"git push origin {BRANCH} --force", cwd=CLONE_DIR, log_callback=log)
+    run(f"git push origin {BRANCH} --force", cwd=clone_dir, log_callback=log)
     return True
 
 
@@ -153,7 +153,7 @@ def create_pr(upstream_repo: str):
 
 # ================== MAIN ENTRY ==================
 
-def run_maintainer(repo_url: str, log_callback=None) -> dict:
+def run_maintainer(repo_url: str, log_callback=None, clone_dir=CLONE_DIR, cancelled=None) -> dict:
     logs = []
 
     def push(line):
@@ -161,6 +161,12 @@ def run_maintainer(repo_url: str, log_callback=None) -> dict:
         if log_callback:
             log_callback(line)
 
+    # Checked before every step that writes to the fork, so a run whose
+    # worker lost its lease never pushes or opens a PR.
+    def checkpoint(step):
+        if cancelled and cancelled():
+            raise RuntimeError(f"Cancelled before {step}")
+
     try:
         upstream_repo = normalize_repo(repo_url)
         push(f"Normalized repo: {upstream_repo}")
@@ -168,21 +174,24 @@ def run_maintainer(repo_url: str, log_callback=None) -> dict:
         fork_repo(upstream_repo)
         push("Fork step completed")
 
-        clone_repo(upstream_repo, push)
+        clone_repo(upstream_repo, push, clone_dir)
         push("Clone completed")
 
-        sync_fork(upstream_repo, push)
+        checkpoint("sync")
+        sync_fork(upstream_repo, push, clone_dir)
         push("Sync completed")
 
-        checkout_branch(push)
+        checkout_branch(push, clone_dir)
         push("Branch ready")
 
-        run_docker(push)
+        run_docker(push, clone_dir)
         push("Docker execution finished")
 
-        changed = commit_and_push(push)
+        checkpoint("commit & push")
+        changed = commit_and_push(push, clone_dir)
         push("Commit & push done" if changed else "No changes to commit")
 
+        checkpoint("PR")
         pr_info = create_pr(upstream_repo)
         push(f"PR result: {pr_info}")
 
@@ -0,0 +1,228 @@
+import os
+import sys
+import uuid
+import time
+import shutil
+import socket
+import argparse
+import threading
+import requests
+from dotenv import load_dotenv
+
+from orchestrator import run_maintainer, CLONE_DIR
+
+load_dotenv()
+API_URL = os.environ.get("MAINTAINER_API_URL", "http://localhost:8000")
+POLL_SECONDS = float(os.environ.get("WORKER_POLL_SECONDS", "5"))
+WORKER_TOKEN = os.environ.get("WORKER_TOKEN")
+# Final result delivery: tries, with the delay doubling from RETRY_SECONDS.
+REPORT_ATTEMPTS = 5
+RETRY_SECONDS = 1
+
+
+class LeaseLost(Exception):
+    pass
+
+
+# ------------------ talking to the API node ------------------
+
+class ApiClient:
+    def __init__(self, api_url: str, worker_id: str, token: str = WORKER_TOKEN):
+        self.api_url = api_url.rstrip("/")
+        self.worker_id = worker_id
+        self.token = token
+
+    def _post(self, path: str, payload: dict) -> dict:
+        resp = requests.post(
+            f"{self.api_url}{path}",
+            json={"worker_id": self.worker_id, **payload},
+            headers={"X-Worker-Token": self.token or ""},
+            timeout=30,
+        )
+        if resp.status_code == 409:
+            raise LeaseLost(path)
+        resp.raise_for_status()
+        return resp.json()
+
+    def register(self, capacity: int, active: int) -> dict:
+        return self._post("/workers/register", {"capacity": capacity, "active": active})
+
+    def lease(self, max_jobs: int) -> list:
+        return self._post("/jobs/lease", {"max_jobs": max_jobs})["jobs"]
+
+    def heartbeat(self, job_id: str):
+        self._post(f"/jobs/{job_id}/heartbeat", {})
+
+    def logs(self, job_id: str, lines: list):
+        self._post(f"/jobs/{job_id}/logs", {"lines": lines})
+
+    def complete(self, job_id: str, result: dict):
+        self._post(f"/jobs/{job_id}/complete", {"result": result})
+
+    def fail(self, job_id: str, error: str):
+        self._post(f"/jobs/{job_id}/fail", {"error": error})
+
+
+# ------------------ one leased job ------------------
+
+class JobRunner:
+    """Runs one job, heartbeating and shipping buffered log lines back."""
+
+    def __init__(self, client: ApiClient, job: dict, heartbeat_seconds: float):
+        self.client = client
+        self.job_id = job["job_id"]
+        self.repo_url = job["repo_url"]
+        self.heartbeat_seconds = heartbeat_seconds
+        self.clone_dir = f"{CLONE_DIR}-{self.job_id}"
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.done = threading.Event()
+        self.lost = False
+
+    def log(self, line: str):
+        with self.pending_lock:
+            self.pending.append(line)
+
+    def flush(self):
+        with self.pending_lock:
+            lines, self.pending = self.pending, []
+        if not lines:
+            return
+        try:
+            self.client.logs(self.job_id, lines)
+        except requests.RequestException:
+            # Keep the lines for the next flush rather than losing them.
+            with self.pending_lock:
+                self.pending = lines + self.pending
+            raise
+
+    def _heartbeat_loop(self):
+        while not self.done.wait(self.heartbeat_seconds):
+            try:
+                self.client.heartbeat(self.job_id)
+                self.flush()
+            except LeaseLost:
+                # The job has been re-queued for someone else; stop reporting.
+                self.lost = True
+                return
+            except requests.RequestException as e:
+                print(f"⚠️  Heartbeat failed for {self.job_id}: {e}")
+
+    def run(self):
+        beat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        beat.start()
+        try:
+            result = run_maintainer(
+                self.repo_url, log_callback=self.log, clone_dir=self.clone_dir, cancelled=lambda: self.lost
+            )
+            error = None
+        except Exception as e:
+            result, error = None, str(e)
+        finally:
+            self.done.set()
+            beat.join()
+            shutil.rmtree(self.clone_dir, ignore_errors=True)
+
+        if self.lost:
+            return
+
+        self.report(result, error)
+
+    def report(self, result, error) -> bool:
+        """Deliver the final logs and result, retrying while keeping the lease.
+
+        Losing the result would re-run the whole pipeline on another worker,
+        so on the last try the log lines are dropped rather than the result.
+        """
+        delay = RETRY_SECONDS
+        for attempt in range(1, REPORT_ATTEMPTS + 1):
+            last = attempt == REPORT_ATTEMPTS
+            try:
+                if attempt > 1:
+                    self.client.heartbeat(self.job_id)
+                try:
+                    self.flush()
+                except requests.RequestException:
+                    if not last:
+                        raise
+                    with self.pending_lock:
+                        dropped, self.pending = len(self.pending), []
+                    print(f"⚠️  Dropped {dropped} log lines for {self.job_id}")
+
+                if error is None:
+                    self.client.complete(self.job_id, result)
+                else:
+                    self.client.fail(self.job_id, error)
+                return True
+            except LeaseLost:
+                print(f"⚠️  Lease lost for {self.job_id}, result dropped")
+                return False
+            except requests.RequestException as e:
+                if last:
+                    print(f"❌ Could not report {self.job_id}: {e}")
+                    return False
+                print(f"⚠️  Reporting {self.job_id} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+                delay *= 2
+
+
+# ------------------ worker loop ------------------
+
+class Worker:
+    def __init__(self, api_url: str, capacity: int, worker_id: str = None):
+        self.capacity = capacity
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.client = ApiClient(api_url, self.worker_id)
+        self.running = {}
+        self.heartbeat_seconds = POLL_SECONDS
+
+    def _reap(self):
+        for job_id, thread in list(self.running.items()):
+            if not thread.is_alive():
+                del self.running[job_id]
+
+    def _start(self, job: dict):
+        runner = JobRunner(self.client, job, self.heartbeat_seconds)
+        thread = threading.Thread(target=runner.run, daemon=True)
+        self.running[job["job_id"]] = thread
+        thread.start()
+        print(f"🚚 Leased {job['job_id']} ({job['repo_url']})")
+
+    def poll_once(self):
+        self._reap()
+        # Re-registering each poll keeps the advertised load current.
+        info = self.client.register(self.capacity, len(self.running))
+        # Heartbeat well inside the lease so a slow request does not expire it.
+        self.heartbeat_seconds = min(POLL_SECONDS, info.get("lease_seconds", 120) / 3)
+
+        free = self.capacity - len(self.running)
+        if free > 0:
+            for job in self.client.lease(free):
+                self._start(job)
+
+    def serve_forever(self):
+        print(f"👷 Worker {self.worker_id} serving {self.client.api_url} (capacity {self.capacity})")
+        while True:
+            try:
+                self.poll_once()
+            except requests.RequestException as e:
+                print(f"⚠️  API unreachable: {e}")
+            time.sleep(POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--api", default=API_URL, help="API node base URL")
+    parser.add_argument("--capacity", type=int, default=1, help="Max concurrent jobs")
+    parser.add_argument("--worker-id", default=None)
+    args = parser.parse_args()
+
+    if args.capacity < 1:
+        print("❌ Capacity must be at least 1")
+        sys.exit(1)
+
+    if not WORKER_TOKEN:
+        print("❌ WORKER_TOKEN is missing!")
+        sys.exit(1)
+
+    Worker(args.api, args.capacity, args.worker_id).serve_forever()
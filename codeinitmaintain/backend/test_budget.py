@@ -0,0 +1,100 @@
+import os
+import subprocess
+import pytest
+import budget
+
+
+def write(path, content):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return str(path)
+
+
+def test_estimate_tokens():
+    assert budget.estimate_tokens("") == 0
+    assert budget.estimate_tokens("abcd") == 1
+    assert budget.estimate_tokens("abcde") == 2
+
+
+def test_count_imports():
+    sources = {
+        "/r/utils.py": "def helper(): pass",
+        "/r/a.py": "import utils\nfrom pkg.utils import helper",
+        "/r/b.py": "from utils import helper as h",
+        "/r/pkg/__init__.py": "",
+    }
+
+    counts = budget.count_imports(sources)
+
+    assert counts["/r/utils.py"] == 2
+    assert counts["/r/pkg/__init__.py"] == 1
+    assert counts["/r/a.py"] == 0
+
+
+@pytest.mark.parametrize("line", [
+    "from . import views",
+    "from .. import views as v",
+    "from pkg import views",
+    "from pkg import models, views",
+    "from pkg import (models, views)",
+    "from .views import render",
+    "from pkg.views import render",
+    "import pkg.views",
+])
+def test_count_imports_submodule_forms(line):
+    sources = {"/r/pkg/views.py": "", "/r/pkg/models.py": "", "/r/app.py": line}
+
+    assert budget.count_imports(sources)["/r/pkg/views.py"] == 1
+
+
+def test_plan_orders_and_defers(tmp_path):
+    huge = write(tmp_path / "generated.py", "x = 1\n" * 2000)
+    core = write(tmp_path / "core.py", "def run(): pass\n")
+    leaf = write(tmp_path / "leaf.py", "import core\n" + "# filler\n" * 200)
+    for i, path in enumerate([core, leaf, huge]):
+        os.utime(path, (i, i))
+
+    plan = budget.FilePlan(str(tmp_path), [huge, leaf, core], max_file_tokens=1000)
+
+    assert plan.deferred == [huge]
+    assert plan.order == [core, leaf, huge]
+
+
+def test_budget_skips_and_reports():
+    b = budget.TokenBudget(100)
+
+    assert b.spend("syntax", 60, "a.py")
+    assert not b.spend("syntax", 60, "b.py")
+    assert b.spend("doctor", 40, "c.py")
+    assert b.remaining == 0
+
+    assert b.phases["syntax"] == {"used": 60, "calls": 1, "skipped": ["b.py"], "deferred": []}
+    report = b.report()
+    assert "100/100" in report
+    assert "syntax: 60 tokens, 1 calls, 1 skipped" in report
+
+
+def test_budget_records_deferred():
+    b = budget.TokenBudget(10)
+    b.defer("doctor", ["a.py", "b.py"])
+
+    assert "doctor: 0 tokens, 0 calls, 2 deferred (budget exhausted)" in b.report()
+
+
+def test_recent_ranks_in_git_subfolder(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    sub = tmp_path / "src"
+    sub.mkdir()
+    old = write(sub / "old.py", "a = 1\n")
+    new = write(sub / "new.py", "b = 1\n")
+    git("init", "-q")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "add", "src/old.py")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "old")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "add", "src/new.py")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "new")
+
+    ranks = budget.recent_ranks(str(sub), [old, new])
+
+    assert ranks[new] > ranks[old] > 0
@@ -0,0 +1,143 @@
+import pytest
+import job_queue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return job_queue.SQLiteJobQueue(str(tmp_path / "jobs.db"), lease_seconds=60, clock=clock)
+
+
+def test_enqueue_and_status(queue):
+    job_id = queue.enqueue("github.com/a/b")
+
+    job = queue.get(job_id)
+    assert job["status"] == "queued"
+    assert job["repo_url"] == "github.com/a/b"
+    assert queue.get("missing") is None
+
+
+def test_lease_requires_registered_worker(queue):
+    queue.enqueue("github.com/a/b")
+
+    assert queue.lease("ghost") == []
+
+
+def test_lease_logs_and_complete(queue):
+    job_id = queue.enqueue("github.com/a/b")
+    queue.register_worker("w1", capacity=2)
+
+    leased = queue.lease("w1", max_jobs=2)
+    assert leased == [{"job_id": job_id, "repo_url": "github.com/a/b"}]
+    assert queue.get(job_id)["status"] == "leased"
+
+    assert queue.append_logs(job_id, "w1", ["cloning", "done"])
+    assert queue.complete(job_id, "w1", {"pr_url": "x"})
+
+    job = queue.get(job_id)
+    assert job["status"] == "done"
+    assert job["logs"] == "cloning\ndone\n"
+    assert job["result"] == {"pr_url": "x"}
+    assert queue.workers()[0]["active"] == 0
+
+
+def test_lease_respects_capacity(queue):
+    for _ in range(3):
+        queue.enqueue("github.com/a/b")
+    queue.register_worker("w1", capacity=2)
+
+    assert len(queue.lease("w1", max_jobs=5)) == 2
+    assert queue.lease("w1", max_jobs=5) == []
+
+
+def test_expired_lease_is_requeued_and_fenced(queue, clock):
+    job_id = queue.enqueue("github.com/a/b")
+    queue.register_worker("w1", capacity=1)
+    queue.register_worker("w2", capacity=1)
+    queue.lease("w1")
+
+    clock.now += 30
+    assert queue.heartbeat(job_id, "w1")
+
+    clock.now += 61
+    queue.register_worker("w2", capacity=1)
+    assert queue.lease("w2") == [{"job_id": job_id, "repo_url": "github.com/a/b"}]
+
+    job = queue.get(job_id)
+    assert job["worker_id"] == "w2"
+    assert job["attempts"] == 2
+
+    # The stale worker can no longer write to the job.
+    assert not queue.heartbeat(job_id, "w1")
+    assert not queue.complete(job_id, "w1", {})
+    assert queue.fail(job_id, "w2", "boom")
+    assert queue.get(job_id)["error"] == "boom"
+
+
+def test_dispatch_prefers_least_loaded_worker(queue):
+    queue.enqueue("github.com/a/b")
+    queue.register_worker("busy", capacity=2, active=1)
+    queue.register_worker("idle", capacity=2, active=0)
+
+    assert queue.lease("busy") == []
+    assert len(queue.lease("idle")) == 1
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        job_queue.get_queue("redis")
+
+
+def test_stale_idle_worker_does_not_block_dispatch(queue, clock):
+    queue.enqueue("github.com/a/b")
+    queue.register_worker("a-dead", capacity=4, active=0)
+
+    clock.now += 5
+    queue.register_worker("b", capacity=2, active=1)
+    assert queue.lease("b") == []
+
+    # a-dead has missed several polls; b gets the job well before the lease length.
+    clock.now += queue.worker_ttl
+    queue.register_worker("b", capacity=2, active=1)
+    assert len(queue.lease("b")) == 1
+
+
+def test_job_fails_after_max_attempts(tmp_path, clock):
+    queue = job_queue.SQLiteJobQueue(str(tmp_path / "jobs.db"), lease_seconds=60, max_attempts=2, clock=clock)
+    job_id = queue.enqueue("github.com/a/b")
+
+    for _ in range(2):
+        queue.register_worker("w1", capacity=1)
+        assert len(queue.lease("w1")) == 1
+        clock.now += 61
+
+    assert queue.requeue_expired() == 0
+    job = queue.get(job_id)
+    assert job["status"] == "error"
+    assert job["attempts"] == 2
+    assert "giving up" in job["error"]
+
+    queue.register_worker("w1", capacity=1)
+    assert queue.lease("w1") == []
+    assert queue.workers()[0]["active"] == 0
+
+
+def test_incomplete_backend_fails_on_creation():
+    class Partial(job_queue.JobQueue):
+        def enqueue(self, repo_url):
+            return "id"
+
+    with pytest.raises(TypeError):
+        Partial()
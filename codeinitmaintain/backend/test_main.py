@@ -0,0 +1,71 @@
+import os
+import importlib.util
+import pytest
+from fastapi.testclient import TestClient
+import job_queue
+
+TOKEN = {"X-Worker-Token": "secret"}
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    # Load app/main.py by path (backend/main.py shadows the name) from inside
+    # the tmp dir, so the module-level queue's file lands there.
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location(
+        "app_main", os.path.join(os.path.dirname(__file__), "app", "main.py")
+    )
+    main = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(main)
+
+    monkeypatch.setattr(main, "queue", job_queue.SQLiteJobQueue(str(tmp_path / "test.db")))
+    monkeypatch.setattr(main, "WORKER_TOKEN", "secret")
+    return TestClient(main.app)
+
+
+def lease(api):
+    api.post("/workers/register", json={"worker_id": "w1"}, headers=TOKEN)
+    return api.post("/jobs/lease", json={"worker_id": "w1"}, headers=TOKEN).json()["jobs"]
+
+
+def test_status_reports_in_progress_as_running(api):
+    job_id = api.post("/run", json={"repo_url": "github.com/a/b"}).json()["job_id"]
+
+    status = api.get(f"/status/{job_id}").json()
+    assert status["status"] == "running"
+    assert status["queue_state"] == "queued"
+
+    lease(api)
+    status = api.get(f"/status/{job_id}").json()
+    assert status["status"] == "running"
+    assert status["queue_state"] == "leased"
+    assert "worker_id" not in status
+
+
+def test_status_done_and_not_found(api):
+    job_id = api.post("/run", json={"repo_url": "github.com/a/b"}).json()["job_id"]
+    lease(api)
+    api.post(f"/jobs/{job_id}/complete", json={"worker_id": "w1", "result": {"pr_url": "x"}}, headers=TOKEN)
+
+    status = api.get(f"/status/{job_id}").json()
+    assert status["status"] == "done"
+    assert status["result"] == {"pr_url": "x"}
+    assert api.get("/status/missing").json() == {"status": "not_found"}
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Worker-Token": "wrong"}])
+def test_worker_routes_require_token(api, headers):
+    job_id = api.post("/run", json={"repo_url": "github.com/a/b"}).json()["job_id"]
+
+    assert api.post("/workers/register", json={"worker_id": "evil"}, headers=headers).status_code == 401
+    assert api.get("/workers", headers=headers).status_code == 401
+    resp = api.post(f"/jobs/{job_id}/complete", json={"worker_id": "w1", "result": {}}, headers=headers)
+    assert resp.status_code == 401
+
+
+def test_stale_worker_gets_409(api):
+    job_id = api.post("/run", json={"repo_url": "github.com/a/b"}).json()["job_id"]
+    lease(api)
+
+    resp = api.post(f"/jobs/{job_id}/heartbeat", json={"worker_id": "other"}, headers=TOKEN)
+    assert resp.status_code == 409
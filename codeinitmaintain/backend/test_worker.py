@@ -0,0 +1,119 @@
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+import worker
+
+
+class StubClient:
+    """Records calls; `failures` maps a method name to errors to raise in order."""
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = failures or {}
+
+    def _call(self, name, *args):
+        self.calls.append((name,) + args)
+        errors = self.failures.get(name)
+        if errors:
+            raise errors.pop(0)
+
+    def heartbeat(self, job_id):
+        self._call("heartbeat", job_id)
+
+    def logs(self, job_id, lines):
+        self._call("logs", job_id, list(lines))
+
+    def complete(self, job_id, result):
+        self._call("complete", job_id, result)
+
+    def fail(self, job_id, error):
+        self._call("fail", job_id, error)
+
+
+JOB = {"job_id": "j1", "repo_url": "github.com/a/b"}
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    with patch("worker.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
+def test_post_sends_token_and_maps_409_to_lease_lost():
+    client = worker.ApiClient("http://api/", "w1", token="secret")
+    resp = MagicMock(status_code=409)
+
+    with patch("worker.requests.post", return_value=resp) as mock_post:
+        with pytest.raises(worker.LeaseLost):
+            client.heartbeat("j1")
+
+    mock_post.assert_called_once_with(
+        "http://api/jobs/j1/heartbeat",
+        json={"worker_id": "w1"},
+        headers={"X-Worker-Token": "secret"},
+        timeout=30,
+    )
+
+
+def test_report_flushes_then_completes():
+    client = StubClient()
+    runner = worker.JobRunner(client, JOB, heartbeat_seconds=1)
+    runner.log("cloning")
+
+    assert runner.report({"pr_url": "x"}, None)
+    assert client.calls == [("logs", "j1", ["cloning"]), ("complete", "j1", {"pr_url": "x"})]
+
+
+def test_report_retries_with_heartbeat(no_sleep):
+    client = StubClient({"complete": [requests.HTTPError("502")]})
+    runner = worker.JobRunner(client, JOB, heartbeat_seconds=1)
+
+    assert runner.report({"pr_url": "x"}, None)
+    assert [c[0] for c in client.calls] == ["complete", "heartbeat", "complete"]
+    no_sleep.assert_called_once_with(worker.RETRY_SECONDS)
+
+
+def test_report_drops_logs_rather_than_result():
+    errors = [requests.ConnectionError("down") for _ in range(worker.REPORT_ATTEMPTS)]
+    client = StubClient({"logs": errors})
+    runner = worker.JobRunner(client, JOB, heartbeat_seconds=1)
+    runner.log("line")
+
+    assert runner.report(None, "boom")
+    assert client.calls[-1] == ("fail", "j1", "boom")
+    assert runner.pending == []
+
+
+def test_report_stops_on_lease_lost():
+    client = StubClient({"complete": [worker.LeaseLost("/complete")]})
+    runner = worker.JobRunner(client, JOB, heartbeat_seconds=1)
+
+    assert not runner.report({}, None)
+    assert [c[0] for c in client.calls] == ["complete"]
+
+
+def test_flush_keeps_lines_on_failure():
+    client = StubClient({"logs": [requests.ConnectionError("down")]})
+    runner = worker.JobRunner(client, JOB, heartbeat_seconds=1)
+    runner.log("a")
+    runner.log("b")
+
+    with pytest.raises(requests.ConnectionError):
+        runner.flush()
+    assert runner.pending == ["a", "b"]
+
+
+def test_lost_lease_cancels_run():
+    client = StubClient()
+    runner = worker.JobRunner(client, JOB, heartbeat_seconds=1)
+
+    def fake_run(repo_url, log_callback, clone_dir, cancelled):
+        runner.lost = True
+        assert cancelled()
+        return {"status": "error"}
+
+    with patch("worker.run_maintainer", side_effect=fake_run):
+        runner.run()
+
+    # A stale run reports nothing back.
+    assert client.calls == []